@@ -2,31 +2,188 @@
 Base Synapse agent implementation.
 Handles routing of user requests to appropriate tools.
 """
-import json
+import asyncio
 from typing import Dict, Any
 import time
+from agent.parsing import PreParsed, preprocess
 from tools.slack_tools import SlackTools
 from tools.github_tools import GitHubTools
 from llm.openai_client import OpenAIClient
-from tracking.mlflow_tracker import MLflowTracker
+from memory.redis_cache import RedisCache
+from tracking.mlflow_tracker import get_tracker
+
+# Words ignored when extracting monitor keywords
+_MONITOR_STOP = frozenset({"monitor", "slack", "channel", "for", "in"})
 
 class SynapseAgent:
     def __init__(self):
         """Initialize agent with available tools and dependencies."""
         self.llm_client = OpenAIClient()
-        self.tracker = MLflowTracker()
+        self.tracker = get_tracker()
+        self.cache = RedisCache()
         self.slack_tools = SlackTools(
             llm_client=self.llm_client,
+            cache=self.cache,
             tracker=self.tracker
         )
         self.github_tools = GitHubTools(
             llm_client=self.llm_client,
+            cache=self.cache,
             tracker=self.tracker
         )
         self.tools = {
             "slack": self.slack_tools,
             "github": self.github_tools
         }
+        # (required keywords, handler) pairs, checked in order
+        self._intents = (
+            (frozenset({"summarize", "slack"}), self._do_summarize),
+            (frozenset({"monitor", "slack"}), self._do_monitor),
+            (frozenset({"triage", "github"}), self._do_triage),
+            (frozenset({"review", "pr"}), self._do_review)
+        )
+
+    async def warmup(self):
+        """Open Redis and OpenAI connections ahead of the first request.
+        
+        Failures are ignored; the connections are retried on first use.
+        """
+        await asyncio.gather(
+            self.cache.ping(),
+            self.llm_client.warmup(),
+            return_exceptions=True
+        )
+
+    async def aclose(self):
+        """Flush pending logs and release pooled connections held by the agent's clients."""
+        await self.tracker.aclose()
+        await self.github_tools.client.aclose()
+        await self.slack_tools.client.aclose()
+        await self.cache.aclose()
+        await self.llm_client.aclose()
+
+    async def _extract_with_llm(self, parsed: PreParsed):
+        """Fill in missing Slack fields of a parsed message using the LLM.
+        
+        Regex matches already present are kept.
+        
+        Args:
+            parsed: Preprocessed user message, updated in place
+        """
+        llm_info = await self.llm_client.extract_thread_info(parsed.text)
+        parsed.channel = parsed.channel or llm_info.get("channel")
+        parsed.thread_ts = parsed.thread_ts or llm_info.get("thread_ts")
+
+    async def _do_summarize(self, parsed: PreParsed) -> Dict[str, Any]:
+        """Summarize a Slack thread and post the summary back to it."""
+        if not parsed.channel or not parsed.thread_ts:
+            await self._extract_with_llm(parsed)
+        if not parsed.channel or not parsed.thread_ts:
+            return {
+                "status": "error",
+                "message": "Could not extract channel or thread information from message"
+            }
+        
+        channel = parsed.channel
+        thread_ts = parsed.thread_ts
+        summary_ts = None
+        
+        async def on_update(partial: str):
+            # Post the first partial summary, then edit it in place
+            nonlocal summary_ts
+            if summary_ts is None:
+                posted = await self.slack_tools.post_summary(
+                    channel=channel,
+                    thread_ts=thread_ts,
+                    summary=partial
+                )
+                summary_ts = posted["ts"]
+            else:
+                await self.slack_tools.update_summary(channel, summary_ts, partial)
+        
+        # Get thread summary, streaming partial output into the thread
+        summary = await self.slack_tools.summarize_thread(
+            channel=channel,
+            thread_ts=thread_ts,
+            on_update=on_update
+        )
+        
+        # Post or finalize the summary in the thread
+        if summary_ts is None:
+            await self.slack_tools.post_summary(
+                channel=channel,
+                thread_ts=thread_ts,
+                summary=summary["summary"]
+            )
+        else:
+            await self.slack_tools.update_summary(channel, summary_ts, summary["summary"])
+        
+        return {
+            "status": "success",
+            "action": "summarize_thread",
+            "data": summary
+        }
+
+    async def _do_monitor(self, parsed: PreParsed) -> Dict[str, Any]:
+        """Search a Slack channel for keywords from the message."""
+        if not parsed.channel:
+            await self._extract_with_llm(parsed)
+        if not parsed.channel:
+            return {
+                "status": "error",
+                "message": "Could not extract channel information from message"
+            }
+        
+        # Extract keywords from message
+        keywords = [word for word in parsed.tokens if word not in _MONITOR_STOP]
+        
+        matches = await self.slack_tools.monitor_channel(
+            channel=parsed.channel,
+            keywords=keywords
+        )
+        
+        return {
+            "status": "success",
+            "action": "monitor_channel",
+            "data": {"matches": matches}
+        }
+
+    async def _do_triage(self, parsed: PreParsed) -> Dict[str, Any]:
+        """Triage open issues of the repository named in the message."""
+        repo = parsed.repo
+        if not repo:
+            return {
+                "status": "error",
+                "message": "Could not extract repository information from message"
+            }
+        
+        result = await self.github_tools.triage_issues(repo=repo)
+        return {
+            "status": "success",
+            "action": "triage_issues",
+            "data": result
+        }
+
+    async def _do_review(self, parsed: PreParsed) -> Dict[str, Any]:
+        """Review the pull request named in the message."""
+        repo = parsed.repo
+        pr_number = parsed.pr
+        
+        if not repo or not pr_number:
+            return {
+                "status": "error",
+                "message": "Could not extract repository or PR number from message"
+            }
+        
+        result = await self.github_tools.review_pull_request(
+            repo=repo,
+            pr_number=pr_number
+        )
+        return {
+            "status": "success",
+            "action": "review_pr",
+            "data": result
+        }
 
     async def handle(self, message: str) -> Dict[str, Any]:
         """Handle incoming user message and route to appropriate tool.
@@ -40,103 +197,18 @@ class SynapseAgent:
         start_time = time.time()
         
         try:
-            # Use LLM to extract intent and parameters
-            thread_info = await self.llm_client.extract_thread_info(message)
+            # Extract parameters locally; the LLM is only consulted on a miss
+            parsed = preprocess(message)
             
-            # Parse message to determine intent
-            if "summarize" in message.lower() and "slack" in message.lower():
-                if not thread_info.get("channel") or not thread_info.get("thread_ts"):
-                    return {
-                        "status": "error",
-                        "message": "Could not extract channel or thread information from message"
-                    }
-                
-                # Get thread summary
-                summary = await self.slack_tools.summarize_thread(
-                    channel=thread_info["channel"],
-                    thread_ts=thread_info["thread_ts"]
-                )
-                
-                # Post summary back to thread
-                await self.slack_tools.post_summary(
-                    channel=thread_info["channel"],
-                    thread_ts=thread_info["thread_ts"],
-                    summary=summary["summary"]
-                )
-                
-                return {
-                    "status": "success",
-                    "action": "summarize_thread",
-                    "data": summary
-                }
-                
-            elif "monitor" in message.lower() and "slack" in message.lower():
-                if not thread_info.get("channel"):
-                    return {
-                        "status": "error",
-                        "message": "Could not extract channel information from message"
-                    }
-                
-                # Extract keywords from message
-                keywords = [word for word in message.lower().split() 
-                          if word not in ["monitor", "slack", "channel", "for", "in"]]
-                
-                matches = await self.slack_tools.monitor_channel(
-                    channel=thread_info["channel"],
-                    keywords=keywords
-                )
-                
-                return {
-                    "status": "success",
-                    "action": "monitor_channel",
-                    "data": {"matches": matches}
-                }
-                
-            elif "triage" in message.lower() and "github" in message.lower():
-                # Extract repository from message
-                repo = next((word for word in message.split() 
-                           if "/" in word and "github.com" not in word), None)
-                if not repo:
-                    return {
-                        "status": "error",
-                        "message": "Could not extract repository information from message"
-                    }
-                
-                result = await self.github_tools.triage_issues(repo=repo)
-                return {
-                    "status": "success",
-                    "action": "triage_issues",
-                    "data": result
-                }
-                
-            elif "review" in message.lower() and "pr" in message.lower():
-                # Extract repository and PR number from message
-                repo = next((word for word in message.split() 
-                           if "/" in word and "github.com" not in word), None)
-                pr_number = next((int(word.strip("#")) for word in message.split() 
-                                if word.strip("#").isdigit()), None)
-                
-                if not repo or not pr_number:
-                    return {
-                        "status": "error",
-                        "message": "Could not extract repository or PR number from message"
-                    }
-                
-                result = await self.github_tools.review_pull_request(
-                    repo=repo,
-                    pr_number=pr_number
-                )
-                return {
-                    "status": "success",
-                    "action": "review_pr",
-                    "data": result
-                }
-                
-            else:
-                return {
-                    "status": "error",
-                    "message": "I'm not sure what to do with that request yet."
-                }
+            # Dispatch to the first intent whose keywords all appear
+            for keywords, handler in self._intents:
+                if keywords <= parsed.token_set:
+                    return await handler(parsed)
+            
+            return {
+                "status": "error",
+                "message": "I'm not sure what to do with that request yet."
+            }
                 
         except Exception as e:
             self.tracker.log_tool_usage(
@@ -0,0 +1,66 @@
+"""
+Message preprocessing for the Synapse agent.
+Tokenizes user messages and extracts Slack and GitHub identifiers with regexes.
+"""
+import re
+from dataclasses import dataclass
+from typing import FrozenSet, Optional, Tuple
+
+# Patterns for extracting identifiers locally before falling back to the LLM
+_CHANNEL_RE = re.compile(r"\bC[A-Z0-9]{8,}\b")
+_TS_RE = re.compile(r"\b\d{10}\.\d{6}\b")
+_REPO_RE = re.compile(r"(?<![\w./:-])(?!github\.com/)([\w.-]+/[\w.-]+)")
+_PR_RE = re.compile(r"#(\d+)\b")
+_REVIEW_RE = re.compile(
+    r"(?<![\w./:-])(?!github\.com/)(?P<repo>[\w.-]+/[\w.-]+)(?![\w.-])\D*?(?:#|(?<![\w.-]))(?P<pr>\d+)\b"
+)
+_WORD_RE = re.compile(r"[a-z]+")
+
+
+@dataclass
+class PreParsed:
+    """A user message tokenized and scanned for identifiers in one step."""
+    __slots__ = ("text", "lower", "tokens", "token_set", "channel", "thread_ts", "repo", "pr")
+    text: str
+    lower: str
+    tokens: Tuple[str, ...]
+    token_set: FrozenSet[str]
+    channel: Optional[str]
+    thread_ts: Optional[str]
+    repo: Optional[str]
+    pr: Optional[int]
+
+
+def preprocess(message: str) -> PreParsed:
+    """Tokenize a message and extract Slack and GitHub identifiers using regexes.
+    
+    Args:
+        message: User input message
+        
+    Returns:
+        PreParsed message; identifiers that are absent are None
+    """
+    lower = message.lower()
+    channel = _CHANNEL_RE.search(message)
+    thread_ts = _TS_RE.search(message)
+    
+    # Prefer a repo directly followed by a PR number, else take them separately
+    review = _REVIEW_RE.search(message)
+    if review:
+        repo, pr = review["repo"], int(review["pr"])
+    else:
+        repo_match = _REPO_RE.search(message)
+        pr_match = _PR_RE.search(message)
+        repo = repo_match.group(1) if repo_match else None
+        pr = int(pr_match.group(1)) if pr_match else None
+    
+    return PreParsed(
+        text=message,
+        lower=lower,
+        tokens=tuple(lower.split()),
+        token_set=frozenset(_WORD_RE.findall(lower)),
+        channel=channel.group(0) if channel else None,
+        thread_ts=thread_ts.group(0) if thread_ts else None,
+        repo=repo,
+        pr=pr
+    )
@@ -19,6 +19,7 @@ class Settings(BaseSettings):
     redis_port: int = 6379
     redis_db: int = 0
     redis_password: Optional[str] = None
+    redis_pool_size: int = 64
     
     # MLflow Configuration
     mlflow_tracking_uri: str = "http://localhost:5000"
@@ -26,15 +27,29 @@ class Settings(BaseSettings):
     
     # OpenAI Configuration
     openai_model: str = "gpt-4-turbo-preview"
+    openai_extract_model: str = "gpt-4o-mini"
+    openai_structured_model: str = "gpt-4o"  # Must support json_schema response formats
     openai_max_tokens: int = 500
     openai_temperature: float = 0.3
+    openai_max_concurrency: int = 8
+    openai_triage_bin_tokens: int = 12000  # Issue tokens packed into each triage call
+    
+    # Slack Configuration
+    slack_max_concurrency: int = 8  # Concurrent Web API calls before Slack starts returning 429s
     
     # GitHub Configuration
+    github_tokens: List[str] = []  # Extra tokens, rotated with github_token to spread requests across
     github_default_repo: Optional[str] = None
     github_default_labels: List[str] = ["bug", "enhancement", "documentation", "question"]
+    github_max_concurrency: int = 8  # Stay under GitHub's secondary rate limits
+    github_etag_ttl: int = 600  # Issues and PRs change often, so keep this short
+    github_triage_checkpoint_ttl: int = 604800  # 7 days
+    github_llm_cache_ttl: int = 86400  # Reviews and triage suggestions, keyed by head SHA / updated_at
     
     # Cache Configuration
     cache_ttl: int = 3600  # 1 hour default TTL
+    local_cache_size: int = 1024
+    local_cache_ttl: int = 60  # Kept short so workers don't serve stale entries for long
     
     class Config:
         env_file = ".env"
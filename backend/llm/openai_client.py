@@ -2,72 +2,217 @@
 OpenAI client wrapper for Synapse LLM operations.
 Handles model interactions and prompt management.
 """
-from typing import Dict, List, Optional
+from typing import Awaitable, Callable, Dict, List, Optional
+import asyncio
+import logging
+from functools import lru_cache
+import httpx
 from openai import AsyncOpenAI
-import json
-from ..config import get_settings
+from openai.types.chat import ChatCompletionSystemMessageParam
+import orjson
+import tiktoken
+from ..config import Settings, get_settings
+
+logger = logging.getLogger(__name__)
+
+# Static prompt parts are kept byte-identical across calls so the
+# provider's prompt cache can reuse them
+_SUMMARIZE_SYS_MSG: ChatCompletionSystemMessageParam = {
+    "role": "system",
+    "content": "You are a helpful assistant that summarizes Slack threads."
+}
+_EXTRACT_SYS_MSG: ChatCompletionSystemMessageParam = {
+    "role": "system",
+    "content": "You are a helpful assistant that extracts Slack information."
+}
+_SUMMARIZE_PROMPT_PREFIX = (
+    "Please provide a concise summary of the following Slack thread discussion. "
+    "Focus on key points, decisions made, and action items. "
+    "Format the summary with clear sections.\n\n"
+    "Thread content:\n"
+)
+_SUMMARIZE_PROMPT_SUFFIX = "\n\nSummary:"
+
+# Minimum seconds between partial-summary callbacks; Slack allows
+# roughly one chat.update per second per channel
+_STREAM_UPDATE_INTERVAL = 1.5
+
+async def _send_progress(
+    on_update: Callable[[str], Awaitable[None]],
+    parts: List[str],
+    changed: asyncio.Event,
+    closing: asyncio.Event
+):
+    """Pass the text streamed so far to on_update, at most once per interval.
+    
+    Runs beside the stream so slow or rate-limited updates never stall it;
+    updates that arrive while one is in flight collapse into the latest
+    text. Failures are logged, not raised.
+    
+    Args:
+        on_update: Coroutine called with the text generated so far
+        parts: Streamed text deltas, appended to by the reader
+        changed: Set by the reader whenever parts grows
+        closing: Set once the stream has ended
+    """
+    loop = asyncio.get_running_loop()
+    next_at = 0.0
+    while not closing.is_set():
+        await changed.wait()
+        changed.clear()
+        if closing.is_set():
+            return
+        delay = next_at - loop.time()
+        if delay > 0:
+            # Give up early once the stream ends; the caller sends the final text
+            try:
+                await asyncio.wait_for(closing.wait(), delay)
+                return
+            except asyncio.TimeoutError:
+                pass
+        try:
+            await on_update("".join(parts))
+        except Exception:
+            logger.warning("Partial summary update failed", exc_info=True)
+        next_at = loop.time() + _STREAM_UPDATE_INTERVAL
+
+@lru_cache()
+def get_openai_client(api_key: str) -> AsyncOpenAI:
+    """Get a process-wide AsyncOpenAI client for the given API key.
+    
+    Sharing one client keeps its HTTP/2 connection pool (and TLS sessions
+    to the API) alive across agents and requests.
+    
+    Args:
+        api_key: OpenAI API key
+        
+    Returns:
+        Cached AsyncOpenAI instance
+    """
+    return AsyncOpenAI(
+        api_key=api_key,
+        http_client=httpx.AsyncClient(
+            http2=True,
+            limits=httpx.Limits(max_connections=100, max_keepalive_connections=50)
+        )
+    )
+
+@lru_cache()
+def _get_encoding(model: str) -> tiktoken.Encoding:
+    """Get the tokenizer for a model, falling back to o200k_base if unknown."""
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        return tiktoken.get_encoding("o200k_base")
 
 class OpenAIClient:
-    def __init__(self, api_key: Optional[str] = None):
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        settings: Optional[Settings] = None
+    ):
         """Initialize OpenAI client.
         
         Args:
             api_key: OpenAI API key. If None, uses key from config.
+            settings: Settings to read defaults from (optional, uses get_settings() if None)
         """
-        settings = get_settings()
+        settings = settings or get_settings()
         self.api_key = api_key or settings.openai_api_key
         if not self.api_key:
             raise ValueError("OpenAI API key not provided")
-        self.client = AsyncOpenAI(api_key=self.api_key)
+        self.client = get_openai_client(self.api_key)
         self.model = settings.openai_model
+        self.extract_model = settings.openai_extract_model
+        self.structured_model = settings.openai_structured_model
         self.max_tokens = settings.openai_max_tokens
         self.temperature = settings.openai_temperature
+        # Bounds in-flight completions to stay under OpenAI rate limits
+        self.semaphore = asyncio.Semaphore(settings.openai_max_concurrency)
+
+    def count_tokens(self, text: str, model: Optional[str] = None) -> int:
+        """Count the tokens a model's tokenizer produces for some text.
+        
+        Args:
+            text: Text to tokenize
+            model: Model whose tokenizer to use (optional, uses config if None)
+            
+        Returns:
+            Number of tokens
+        """
+        return len(_get_encoding(model or self.model).encode(text, disallowed_special=()))
 
     async def summarize_thread(
         self,
         messages: List[Dict],
-        model: Optional[str] = None
+        model: Optional[str] = None,
+        on_update: Optional[Callable[[str], Awaitable[None]]] = None
     ) -> Dict:
         """Summarize a thread of messages using LLM.
         
+        The completion is streamed; if on_update is given it is called from a
+        separate task with the partial summary, at most every
+        _STREAM_UPDATE_INTERVAL seconds, so callers can show progress.
+        Update failures are logged and don't affect the summary.
+        
         Args:
             messages: List of message dictionaries
             model: Model to use for summarization (optional, uses config if None)
+            on_update: Coroutine called with the summary generated so far (optional)
             
         Returns:
             Dictionary containing summary and metadata
         """
         # Format messages for the prompt
-        thread_content = "\n".join([
+        thread_content = "\n".join(
             f"{msg.get('user', 'Unknown')}: {msg.get('text', '')}"
             for msg in messages
-        ])
+        )
         
-        prompt = f"""Please provide a concise summary of the following Slack thread discussion. 
-        Focus on key points, decisions made, and action items. Format the summary with clear sections.
-
-        Thread content:
-        {thread_content}
-
-        Summary:"""
+        prompt = _SUMMARIZE_PROMPT_PREFIX + thread_content + _SUMMARIZE_PROMPT_SUFFIX
 
         try:
-            response = await self.client.chat.completions.create(
-                model=model or self.model,
-                messages=[
-                    {"role": "system", "content": "You are a helpful assistant that summarizes Slack threads."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=self.temperature,
-                max_tokens=self.max_tokens
-            )
+            parts = []
+            token_count = 0
+            changed = asyncio.Event()
+            closing = asyncio.Event()
+            sender = None
+            if on_update:
+                sender = asyncio.create_task(_send_progress(on_update, parts, changed, closing))
+            try:
+                async with self.semaphore:
+                    stream = await self.client.chat.completions.create(
+                        model=model or self.model,
+                        messages=[
+                            _SUMMARIZE_SYS_MSG,
+                            {"role": "user", "content": prompt}
+                        ],
+                        temperature=self.temperature,
+                        max_tokens=self.max_tokens,
+                        stream=True,
+                        stream_options={"include_usage": True}
+                    )
+                    async for chunk in stream:
+                        # The final chunk carries usage and no choices
+                        if chunk.usage:
+                            token_count = chunk.usage.total_tokens
+                        if not chunk.choices or not chunk.choices[0].delta.content:
+                            continue
+                        parts.append(chunk.choices[0].delta.content)
+                        changed.set()
+            finally:
+                # Wait out an update in flight so callers see its effects
+                if sender is not None:
+                    closing.set()
+                    changed.set()
+                    await sender
             
-            summary = response.choices[0].message.content
+            summary = "".join(parts)
             
             return {
                 "summary": summary,
                 "model": model or self.model,
-                "token_count": response.usage.total_tokens
+                "token_count": token_count
             }
             
         except Exception as e:
@@ -80,7 +225,8 @@ class OpenAIClient:
             message: User input message
             
         Returns:
-            Dictionary containing channel and thread information
+            Dictionary containing channel and thread information (fields are
+            None if the model output could not be parsed)
         """
         prompt = f"""Extract the Slack channel ID and thread timestamp from the following message.
         If not found, return null for those fields.
@@ -90,18 +236,31 @@ class OpenAIClient:
         Return the result as a JSON object with 'channel' and 'thread_ts' fields."""
 
         try:
-            response = await self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": "You are a helpful assistant that extracts Slack information."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.1,
-                max_tokens=100
-            )
+            async with self.semaphore:
+                response = await self.client.chat.completions.create(
+                    model=self.extract_model,
+                    messages=[
+                        _EXTRACT_SYS_MSG,
+                        {"role": "user", "content": prompt}
+                    ],
+                    response_format={"type": "json_object"},
+                    temperature=0.1,
+                    max_tokens=60
+                )
             
-            result = json.loads(response.choices[0].message.content)
+            result = orjson.loads(response.choices[0].message.content)
             return result
             
+        except orjson.JSONDecodeError:
+            return {"channel": None, "thread_ts": None}
         except Exception as e:
-            raise Exception(f"Error extracting thread info: {str(e)}") 
\ No newline at end of file
+            raise Exception(f"Error extracting thread info: {str(e)}")
+
+    async def warmup(self):
+        """Issue a cheap request so the connection and TLS session are ready."""
+        await self.client.models.list()
+
+    async def aclose(self):
+        """Close the shared HTTP client and drop it from the process cache."""
+        await self.client.close()
+        get_openai_client.cache_clear()
@@ -1,12 +1,19 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request
 from agent.base import SynapseAgent
 
-app = FastAPI()
-agent = SynapseAgent()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    app.state.agent = SynapseAgent()
+    await app.state.agent.warmup()
+    yield
+    await app.state.agent.aclose()
+
+app = FastAPI(lifespan=lifespan)
 
 @app.post("/agent")
 async def run_agent(request: Request):
     data = await request.json()
     user_input = data.get("message", "")
-    response = await agent.handle(user_input)
+    response = await request.app.state.agent.handle(user_input)
     return {"response": response}
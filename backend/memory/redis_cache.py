@@ -2,11 +2,34 @@
 Redis cache manager for Synapse.
 Handles caching of thread summaries and other frequently accessed data.
 """
-import json
-from typing import Dict, Optional
+import msgpack
+import time
+from typing import Any, Dict, List, Optional, Tuple
+from cachetools import TTLCache
 import redis.asyncio as redis
 from datetime import timedelta
-from ..config import get_settings
+from ..config import Settings, get_settings
+
+def _summary_key(channel: str, content_hash: str) -> str:
+    """Build the Redis key for a thread summary.
+    
+    Keys are content-addressed, so a thread that gains replies maps to a
+    new key instead of returning a stale summary. Values are msgpack;
+    the prefix differs from the old JSON-encoded thread_summary: keys.
+    """
+    return f"slack:summary:{channel}:{content_hash}"
+
+def _triaged_key(repo: str, issue_number: int, content_hash: str) -> str:
+    """Build the Redis key recording that an issue version was triaged."""
+    return f"triaged:{repo}:{issue_number}:{content_hash}"
+
+def _review_key(repo: str, pr_number: int, head_sha: str) -> str:
+    """Build the Redis key for a pull request review at a given head commit."""
+    return f"review:{repo}:{pr_number}:{head_sha}"
+
+def _triage_key(repo: str, issue_number: int, updated_at: str) -> str:
+    """Build the Redis key for a triage suggestion for an issue version."""
+    return f"triage:{repo}:{issue_number}:{updated_at}"
 
 class RedisCache:
     def __init__(
@@ -14,7 +37,8 @@ class RedisCache:
         host: Optional[str] = None,
         port: Optional[int] = None,
         db: Optional[int] = None,
-        password: Optional[str] = None
+        password: Optional[str] = None,
+        settings: Optional[Settings] = None
     ):
         """Initialize Redis cache.
         
@@ -23,34 +47,77 @@ class RedisCache:
             port: Redis port (optional, uses config if None)
             db: Redis database number (optional, uses config if None)
             password: Redis password (optional, uses config if None)
+            settings: Settings to read defaults from (optional, uses get_settings() if None)
         """
-        settings = get_settings()
-        self.redis = redis.Redis(
+        settings = settings or get_settings()
+        self.pool = redis.BlockingConnectionPool(
             host=host or settings.redis_host,
             port=port or settings.redis_port,
             db=db or settings.redis_db,
             password=password or settings.redis_password,
-            decode_responses=True
+            decode_responses=False,
+            max_connections=settings.redis_pool_size,
+            protocol=3  # RESP3; parsed by hiredis when installed
+        )
+        self.redis = redis.Redis(connection_pool=self.pool)
+        self._default_ttl = settings.cache_ttl
+        self._triage_ttl = settings.github_triage_checkpoint_ttl
+        self._llm_ttl = settings.github_llm_cache_ttl
+        # In-process layer in front of Redis for hot keys
+        self._local = TTLCache(
+            maxsize=settings.local_cache_size,
+            ttl=min(settings.local_cache_ttl, settings.cache_ttl)
         )
         
-    async def get_thread_summary(self, channel: str, thread_ts: str) -> Optional[Dict]:
+    async def get_thread_summary(self, channel: str, content_hash: str) -> Optional[Dict]:
         """Get cached thread summary.
         
         Args:
             channel: Slack channel ID
-            thread_ts: Thread timestamp
+            content_hash: Digest of the thread content
             
         Returns:
             Cached summary dictionary or None if not found
         """
-        key = f"thread_summary:{channel}:{thread_ts}"
+        key = _summary_key(channel, content_hash)
+        summary = self._local.get(key)
+        if summary is not None:
+            return summary
         data = await self.redis.get(key)
-        return json.loads(data) if data else None
+        if not data:
+            return None
+        summary = msgpack.unpackb(data, raw=False)
+        self._local[key] = summary
+        return summary
+        
+    async def mget_thread_summaries(
+        self,
+        threads: List[Tuple[str, str]]
+    ) -> List[Optional[Dict]]:
+        """Get cached summaries for several threads in one round trip.
+        
+        Args:
+            threads: List of (channel, content_hash) pairs
+            
+        Returns:
+            List of summary dictionaries (None where not cached), in input order
+        """
+        keys = [_summary_key(channel, content_hash) for channel, content_hash in threads]
+        summaries = [self._local.get(key) for key in keys]
+        missing = [i for i, summary in enumerate(summaries) if summary is None]
+        if not missing:
+            return summaries
+        
+        raw = await self.redis.mget([keys[i] for i in missing])
+        for i, data in zip(missing, raw):
+            if data:
+                summaries[i] = self._local[keys[i]] = msgpack.unpackb(data, raw=False)
+        return summaries
         
     async def set_thread_summary(
         self,
         channel: str,
-        thread_ts: str,
+        content_hash: str,
         summary: Dict,
         ttl: Optional[int] = None
     ):
@@ -58,24 +125,204 @@ class RedisCache:
         
         Args:
             channel: Slack channel ID
-            thread_ts: Thread timestamp
+            content_hash: Digest of the thread content
             summary: Summary dictionary to cache
             ttl: Time to live in seconds (optional, uses config if None)
         """
-        settings = get_settings()
-        key = f"thread_summary:{channel}:{thread_ts}"
+        key = _summary_key(channel, content_hash)
+        self._local.pop(key, None)
         await self.redis.setex(
             key,
-            timedelta(seconds=ttl or settings.cache_ttl),
-            json.dumps(summary)
+            timedelta(seconds=ttl or self._default_ttl),
+            msgpack.packb(summary, use_bin_type=True)
         )
         
-    async def invalidate_thread_summary(self, channel: str, thread_ts: str):
+    async def set_thread_summaries(
+        self,
+        summaries: Dict[Tuple[str, str], Dict],
+        ttl: Optional[int] = None
+    ):
+        """Cache several thread summaries using a single pipeline.
+        
+        Args:
+            summaries: Mapping of (channel, content_hash) to summary dictionary
+            ttl: Time to live in seconds (optional, uses config if None)
+        """
+        expiry = timedelta(seconds=ttl or self._default_ttl)
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for (channel, content_hash), summary in summaries.items():
+                key = _summary_key(channel, content_hash)
+                self._local.pop(key, None)
+                pipe.setex(key, expiry, msgpack.packb(summary, use_bin_type=True))
+            await pipe.execute()
+        
+    async def get_etag_response(self, url: str) -> Optional[Tuple[str, Any]]:
+        """Get a cached HTTP response body and its ETag.
+        
+        Args:
+            url: Request URL
+            
+        Returns:
+            (etag, body) tuple or None if not cached
+        """
+        data = await self.redis.get(f"gh:etag:{url}")
+        if not data:
+            return None
+        entry = msgpack.unpackb(data, raw=False)
+        return entry["etag"], entry["body"]
+        
+    async def set_etag_response(self, url: str, etag: str, body: Any, ttl: int):
+        """Cache an HTTP response body under its ETag.
+        
+        Args:
+            url: Request URL
+            etag: ETag header returned with the body
+            body: Decoded response body
+            ttl: Time to live in seconds
+        """
+        await self.redis.setex(
+            f"gh:etag:{url}",
+            timedelta(seconds=ttl),
+            msgpack.packb({"etag": etag, "body": body}, use_bin_type=True)
+        )
+        
+    async def get_review(self, repo: str, pr_number: int, head_sha: str) -> Optional[Dict]:
+        """Get a cached pull request review.
+        
+        Args:
+            repo: Repository name (owner/repo)
+            pr_number: Pull request number
+            head_sha: SHA of the PR head commit the review was made for
+            
+        Returns:
+            Cached review dictionary or None if not found
+        """
+        data = await self.redis.get(_review_key(repo, pr_number, head_sha))
+        if not data:
+            return None
+        return msgpack.unpackb(data, raw=False)
+        
+    async def set_review(
+        self,
+        repo: str,
+        pr_number: int,
+        head_sha: str,
+        review: Dict,
+        ttl: Optional[int] = None
+    ):
+        """Cache a pull request review.
+        
+        Args:
+            repo: Repository name (owner/repo)
+            pr_number: Pull request number
+            head_sha: SHA of the PR head commit the review was made for
+            review: Review dictionary to cache
+            ttl: Time to live in seconds (optional, uses config if None)
+        """
+        await self.redis.setex(
+            _review_key(repo, pr_number, head_sha),
+            timedelta(seconds=ttl or self._llm_ttl),
+            msgpack.packb(review, use_bin_type=True)
+        )
+        
+    async def mget_triage_suggestions(
+        self,
+        repo: str,
+        issues: List[Tuple[int, str]]
+    ) -> List[Optional[Dict]]:
+        """Get cached triage suggestions for several issues in one round trip.
+        
+        Args:
+            repo: Repository name (owner/repo)
+            issues: List of (issue_number, updated_at) pairs
+            
+        Returns:
+            List of suggestion dictionaries (None where not cached), in input order
+        """
+        if not issues:
+            return []
+        raw = await self.redis.mget([_triage_key(repo, n, u) for n, u in issues])
+        return [msgpack.unpackb(data, raw=False) if data else None for data in raw]
+        
+    async def set_triage_suggestions(
+        self,
+        repo: str,
+        suggestions: Dict[Tuple[int, str], Dict],
+        ttl: Optional[int] = None
+    ):
+        """Cache several triage suggestions using a single pipeline.
+        
+        Args:
+            repo: Repository name (owner/repo)
+            suggestions: Mapping of (issue_number, updated_at) to suggestion dictionary
+            ttl: Time to live in seconds (optional, uses config if None)
+        """
+        expiry = timedelta(seconds=ttl or self._llm_ttl)
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for (issue_number, updated_at), suggestion in suggestions.items():
+                pipe.setex(
+                    _triage_key(repo, issue_number, updated_at),
+                    expiry,
+                    msgpack.packb(suggestion, use_bin_type=True)
+                )
+            await pipe.execute()
+        
+    async def get_triaged(self, repo: str, issues: List[Tuple[int, str]]) -> List[bool]:
+        """Check which issue versions have already been triaged, in one MGET.
+        
+        Args:
+            repo: Repository name (owner/repo)
+            issues: List of (issue_number, content_hash) pairs
+            
+        Returns:
+            True for each issue that has a triage checkpoint, in input order
+        """
+        if not issues:
+            return []
+        values = await self.redis.mget([_triaged_key(repo, n, h) for n, h in issues])
+        return [value is not None for value in values]
+        
+    async def set_triaged(
+        self,
+        repo: str,
+        issue_number: int,
+        content_hash: str,
+        ttl: Optional[int] = None
+    ):
+        """Record that an issue version was triaged.
+        
+        Args:
+            repo: Repository name (owner/repo)
+            issue_number: Issue number
+            content_hash: Digest of the issue content the triage applies to
+            ttl: Time to live in seconds (optional, uses config if None)
+        """
+        await self.redis.setex(
+            _triaged_key(repo, issue_number, content_hash),
+            timedelta(seconds=ttl or self._triage_ttl),
+            str(int(time.time()))
+        )
+        
+    async def invalidate_thread_summary(self, channel: str, content_hash: str):
         """Remove cached thread summary.
         
         Args:
             channel: Slack channel ID
-            thread_ts: Thread timestamp
+            content_hash: Digest of the thread content
         """
-        key = f"thread_summary:{channel}:{thread_ts}"
-        await self.redis.delete(key) 
\ No newline at end of file
+        key = _summary_key(channel, content_hash)
+        self._local.pop(key, None)
+        await self.redis.delete(key)
+
+    async def ping(self) -> bool:
+        """Check connectivity, opening a pooled connection if needed.
+        
+        Returns:
+            True if Redis responded
+        """
+        return await self.redis.ping()
+
+    async def aclose(self):
+        """Close the client and disconnect all pooled connections."""
+        await self.redis.aclose()
+        await self.pool.disconnect()
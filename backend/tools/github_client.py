@@ -2,69 +2,423 @@
 GitHub API client for Synapse agent platform.
 Handles authentication, issue management, and PR operations.
 """
-from typing import Dict, List, Optional
-from github import Github, Auth
-from github.Issue import Issue
-from github.PullRequest import PullRequest
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+import asyncio
+import itertools
+import time
+import aiohttp
 from ..config import get_settings
+from ..memory.redis_cache import RedisCache
+from .retry import backoff_delay, is_retryable
+
+# Attempts per request for rate-limited (429, or 403 with rate-limit headers)
+# responses, and for 5xx responses to idempotent requests
+_RETRIES = 5
+_IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "PUT", "DELETE"})
+
+_API_URL = "https://api.github.com"
+_GRAPHQL_URL = f"{_API_URL}/graphql"
+_CONNECTIONS_PER_HOST = 64
+_DEFAULT_RATE_LIMIT = 5000  # Assumed remaining budget for tokens not yet used
+
+# REST-style state names mapped to GraphQL state enums
+_ISSUE_STATES = {"open": ["OPEN"], "closed": ["CLOSED"], "all": ["OPEN", "CLOSED"]}
+_PR_STATES = {"open": ["OPEN"], "closed": ["CLOSED", "MERGED"], "all": ["OPEN", "CLOSED", "MERGED"]}
+
+_ISSUES_QUERY = """
+query($owner: String!, $name: String!, $states: [IssueState!], $labels: [String!], $after: String) {
+  repository(owner: $owner, name: $name) {
+    issues(first: 100, states: $states, labels: $labels, after: $after) {
+      pageInfo { hasNextPage endCursor }
+      nodes { number title body updatedAt labels(first: 20) { nodes { name } } }
+    }
+  }
+}
+"""
+
+_PULL_REQUESTS_QUERY = """
+query($owner: String!, $name: String!, $states: [PullRequestState!], $after: String) {
+  repository(owner: $owner, name: $name) {
+    pullRequests(first: 100, states: $states, after: $after) {
+      pageInfo { hasNextPage endCursor }
+      nodes { number title body changedFiles additions deletions }
+    }
+  }
+}
+"""
+
+def _is_rate_limited(headers) -> bool:
+    """Tell a rate-limit 403 apart from a permanent one (scope, access)."""
+    return headers.get("X-RateLimit-Remaining") == "0" or "Retry-After" in headers
 
 class GitHubClient:
-    def __init__(self, token: Optional[str] = None):
+    def __init__(
+        self,
+        token: Optional[str] = None,
+        tokens: Optional[List[str]] = None,
+        cache: Optional[RedisCache] = None
+    ):
         """Initialize GitHub client.
         
         Args:
             token: GitHub token. If None, uses token from config.
+            tokens: Several tokens to rotate between, raising the combined
+                rate limit. If None, uses the config token plus any extra
+                github_tokens.
+            cache: RedisCache for ETag-conditional GETs (optional, disabled if None)
         """
         settings = get_settings()
-        self.token = token or settings.github_token
-        if not self.token:
+        if token and not tokens:
+            tokens = [token]
+        if not tokens:
+            tokens = [settings.github_token, *settings.github_tokens]
+        self.tokens = [t for t in dict.fromkeys(tokens) if t]
+        if not self.tokens:
             raise ValueError("GitHub token not provided")
-        self.client = Github(auth=Auth.Token(self.token))
+        self.token = self.tokens[0]
+        self._offsets = itertools.cycle(range(len(self.tokens)))
+        # Budgets are per (token, resource): REST ("core") and GraphQL are
+        # rate-limited separately
+        self._remaining: Dict[Tuple[str, str], int] = {}
+        self._reset: Dict[Tuple[str, str], float] = {}
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._semaphore = asyncio.Semaphore(settings.github_max_concurrency)
+        self.cache = cache
+        self.etag_ttl = settings.github_etag_ttl
 
-    async def get_issues(
+    def _get_session(self) -> aiohttp.ClientSession:
+        """Get the shared HTTP session, creating it on first use.
+        
+        The session is created lazily because aiohttp binds it to the
+        running event loop.
+        """
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                headers={"Accept": "application/vnd.github+json"},
+                connector=aiohttp.TCPConnector(
+                    limit=_CONNECTIONS_PER_HOST,
+                    limit_per_host=_CONNECTIONS_PER_HOST
+                )
+            )
+        return self._session
+
+    async def _pick_token(self, resource: str) -> str:
+        """Choose the token with the most rate-limit budget left for a resource.
+        
+        Ties are broken round-robin. If every token is exhausted, waits
+        until the earliest one resets.
+        
+        Args:
+            resource: Rate-limit resource the request counts against
+                ("core" or "graphql")
+            
+        Returns:
+            Token to authenticate the next request with
+        """
+        start = next(self._offsets)
+        ordered = self.tokens[start:] + self.tokens[:start]
+        token = max(ordered, key=lambda t: self._remaining.get((t, resource), _DEFAULT_RATE_LIMIT))
+        if self._remaining.get((token, resource), _DEFAULT_RATE_LIMIT) > 0:
+            return token
+        
+        token = min(self.tokens, key=lambda t: self._reset.get((t, resource), 0))
+        delay = self._reset.get((token, resource), 0) - time.time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        self._remaining.pop((token, resource), None)
+        return token
+
+    def _record_rate_limit(self, token: str, resource: str, headers):
+        """Remember a token's remaining budget from response headers.
+        
+        X-RateLimit-Resource, when present, names the budget the headers
+        describe; otherwise the resource the request was made against is used.
+        """
+        key = (token, headers.get("X-RateLimit-Resource", resource))
+        if "X-RateLimit-Remaining" in headers:
+            self._remaining[key] = int(headers["X-RateLimit-Remaining"])
+        if "X-RateLimit-Reset" in headers:
+            self._reset[key] = float(headers["X-RateLimit-Reset"])
+
+    async def _request(
+        self,
+        method: str,
+        url: str,
+        idempotent: Optional[bool] = None,
+        **kwargs
+    ) -> Any:
+        """Send a request, backing off exponentially while GitHub rate-limits it.
+        
+        At most github_max_concurrency requests are in flight per client,
+        and Retry-After is honoured when GitHub sends it.
+        
+        With a cache configured, GETs are sent with If-None-Match and a 304
+        (which costs no rate limit) is answered from the cached body.
+        
+        Args:
+            method: HTTP method
+            url: Absolute URL or path relative to the REST API root
+            idempotent: Whether 5xx responses may be retried (optional,
+                inferred from the method if None)
+            **kwargs: Extra arguments for aiohttp (json, params, ...)
+            
+        Returns:
+            Decoded JSON response body
+        """
+        if url.startswith("/"):
+            url = _API_URL + url
+        session = self._get_session()
+        cached = None
+        if method == "GET" and self.cache is not None:
+            cached = await self.cache.get_etag_response(url)
+        resource = "graphql" if url == _GRAPHQL_URL else "core"
+        if idempotent is None:
+            idempotent = method in _IDEMPOTENT_METHODS
+        for attempt in range(_RETRIES):
+            token = await self._pick_token(resource)
+            headers = {"Authorization": f"Bearer {token}"}
+            if cached:
+                headers["If-None-Match"] = cached[0]
+            async with self._semaphore:
+                async with session.request(method, url, headers=headers, **kwargs) as r:
+                    self._record_rate_limit(token, resource, r.headers)
+                    if r.status == 304 and cached:
+                        return cached[1]
+                    if attempt < _RETRIES - 1 and (
+                        is_retryable(r.status, idempotent)
+                        or (r.status == 403 and _is_rate_limited(r.headers))
+                    ):
+                        delay = backoff_delay(attempt, r.headers.get("Retry-After"))
+                    else:
+                        r.raise_for_status()
+                        body = await r.json()
+                        if method == "GET" and self.cache is not None and "ETag" in r.headers:
+                            await self.cache.set_etag_response(url, r.headers["ETag"], body, self.etag_ttl)
+                        return body
+            # Sleep outside the semaphore so waiting retries don't block other requests
+            await asyncio.sleep(delay)
+
+    async def aclose(self):
+        """Close the HTTP session and its pooled connections."""
+        if self._session is not None:
+            await self._session.close()
+
+    async def gql_query(self, query: str, variables: Dict[str, Any]) -> Dict:
+        """Run a GraphQL query against the GitHub API.
+        
+        Args:
+            query: GraphQL query document
+            variables: Query variables
+            
+        Returns:
+            The response's data object
+        """
+        result = await self._request(
+            "POST",
+            _GRAPHQL_URL,
+            # Queries are reads and safe to retry; mutations are not
+            idempotent=not query.lstrip().startswith("mutation"),
+            json={"query": query, "variables": variables}
+        )
+        if result.get("errors"):
+            raise Exception(result["errors"][0]["message"])
+        return result["data"]
+
+    async def _iter_gql_pages(
+        self,
+        query: str,
+        field: str,
+        variables: Dict[str, Any]
+    ) -> AsyncIterator[List[Dict]]:
+        """Yield pages of nodes from a paginated repository connection.
+        
+        The next page is only requested once the caller asks for it, so
+        stopping iteration early saves the remaining API calls.
+        
+        Args:
+            query: GraphQL query taking an $after cursor
+            field: Connection field under repository (e.g. "issues")
+            variables: Query variables other than the cursor
+            
+        Yields:
+            Lists of raw GraphQL nodes, one per page
+        """
+        after = None
+        while True:
+            data = await self.gql_query(query, {**variables, "after": after})
+            connection = data["repository"][field]
+            yield connection["nodes"]
+            if not connection["pageInfo"]["hasNextPage"]:
+                return
+            after = connection["pageInfo"]["endCursor"]
+
+    async def iter_issues(
         self,
         repo: str,
         state: str = "open",
         labels: Optional[List[str]] = None
-    ) -> List[Issue]:
-        """Get repository issues.
+    ) -> AsyncIterator[Dict]:
+        """Iterate over repository issues, fetching pages on demand.
         
         Args:
             repo: Repository name (owner/repo)
             state: Issue state (open/closed/all)
             labels: List of labels to filter by
             
-        Returns:
-            List of Issue objects
+        Yields:
+            Issue dictionaries (number, title, body, updated_at, labels)
         """
         try:
-            repository = self.client.get_repo(repo)
-            issues = repository.get_issues(state=state, labels=labels)
-            return list(issues)
+            owner, name = repo.split("/", 1)
+            pages = self._iter_gql_pages(_ISSUES_QUERY, "issues", {
+                "owner": owner,
+                "name": name,
+                "states": _ISSUE_STATES[state],
+                "labels": labels
+            })
+            async for nodes in pages:
+                for node in nodes:
+                    yield {
+                        "number": node["number"],
+                        "title": node["title"],
+                        "body": node["body"],
+                        "updated_at": node["updatedAt"],
+                        "labels": [label["name"] for label in node["labels"]["nodes"]]
+                    }
         except Exception as e:
             raise Exception(f"Error fetching issues: {str(e)}")
 
+    async def get_issues(
+        self,
+        repo: str,
+        state: str = "open",
+        labels: Optional[List[str]] = None
+    ) -> List[Dict]:
+        """Get all repository issues with their labels.
+        
+        Args:
+            repo: Repository name (owner/repo)
+            state: Issue state (open/closed/all)
+            labels: List of labels to filter by
+            
+        Returns:
+            List of issue dictionaries (number, title, body, updated_at, labels)
+        """
+        return [issue async for issue in self.iter_issues(repo, state=state, labels=labels)]
+
     async def get_pull_requests(
         self,
         repo: str,
         state: str = "open"
-    ) -> List[PullRequest]:
-        """Get repository pull requests.
+    ) -> List[Dict]:
+        """Get repository pull requests in one query per page.
         
         Args:
             repo: Repository name (owner/repo)
             state: PR state (open/closed/all)
             
         Returns:
-            List of PullRequest objects
+            List of pull request dictionaries (number, title, body,
+            changed_files, additions, deletions)
         """
         try:
-            repository = self.client.get_repo(repo)
-            prs = repository.get_pulls(state=state)
-            return list(prs)
+            owner, name = repo.split("/", 1)
+            pages = self._iter_gql_pages(_PULL_REQUESTS_QUERY, "pullRequests", {
+                "owner": owner,
+                "name": name,
+                "states": _PR_STATES[state]
+            })
+            nodes = [node async for page in pages for node in page]
+            return [
+                {
+                    "number": node["number"],
+                    "title": node["title"],
+                    "body": node["body"],
+                    "changed_files": node["changedFiles"],
+                    "additions": node["additions"],
+                    "deletions": node["deletions"]
+                }
+                for node in nodes
+            ]
         except Exception as e:
             raise Exception(f"Error fetching pull requests: {str(e)}")
 
+    async def get_pull_request(
+        self,
+        repo: str,
+        pr_number: int
+    ) -> Optional[Dict]:
+        """Get a single pull request.
+        
+        Args:
+            repo: Repository name (owner/repo)
+            pr_number: Pull request number
+            
+        Returns:
+            Pull request dictionary (same fields as get_pull_requests plus
+            head_sha), or None if it does not exist
+        """
+        try:
+            pr = await self._request("GET", f"/repos/{repo}/pulls/{pr_number}")
+            return {
+                "number": pr["number"],
+                "title": pr["title"],
+                "body": pr["body"],
+                "changed_files": pr["changed_files"],
+                "additions": pr["additions"],
+                "deletions": pr["deletions"],
+                "head_sha": pr["head"]["sha"]
+            }
+        except aiohttp.ClientResponseError as e:
+            if e.status == 404:
+                return None
+            raise Exception(f"Error fetching pull request: {str(e)}")
+        except Exception as e:
+            raise Exception(f"Error fetching pull request: {str(e)}")
+
+    async def get_pull_request_files(
+        self,
+        repo: str,
+        pr_number: int
+    ) -> List[Dict]:
+        """Get the files changed by a pull request (first 100).
+        
+        Args:
+            repo: Repository name (owner/repo)
+            pr_number: Pull request number
+            
+        Returns:
+            List of file dictionaries (filename, status, additions, deletions)
+        """
+        try:
+            files = await self._request("GET", f"/repos/{repo}/pulls/{pr_number}/files?per_page=100")
+            return [
+                {
+                    "filename": f["filename"],
+                    "status": f["status"],
+                    "additions": f["additions"],
+                    "deletions": f["deletions"]
+                }
+                for f in files
+            ]
+        except Exception as e:
+            raise Exception(f"Error fetching pull request files: {str(e)}")
+
+    async def get_assignees(self, repo: str) -> List[str]:
+        """Get users that issues in a repository can be assigned to (first 100).
+        
+        Args:
+            repo: Repository name (owner/repo)
+            
+        Returns:
+            List of user logins
+        """
+        try:
+            users = await self._request("GET", f"/repos/{repo}/assignees?per_page=100")
+            return [user["login"] for user in users]
+        except Exception as e:
+            raise Exception(f"Error fetching assignees: {str(e)}")
+
     async def create_issue(
         self,
         repo: str,
@@ -72,7 +426,7 @@ class GitHubClient:
         body: str,
         labels: Optional[List[str]] = None,
         assignees: Optional[List[str]] = None
-    ) -> Issue:
+    ) -> Dict:
         """Create a new issue.
         
         Args:
@@ -83,17 +437,19 @@ class GitHubClient:
             assignees: List of assignees
             
         Returns:
-            Created Issue object
+            Created issue data
         """
         try:
-            repository = self.client.get_repo(repo)
-            issue = repository.create_issue(
-                title=title,
-                body=body,
-                labels=labels or [],
-                assignees=assignees or []
+            return await self._request(
+                "POST",
+                f"/repos/{repo}/issues",
+                json={
+                    "title": title,
+                    "body": body,
+                    "labels": labels or [],
+                    "assignees": assignees or []
+                }
             )
-            return issue
         except Exception as e:
             raise Exception(f"Error creating issue: {str(e)}")
 
@@ -114,13 +470,15 @@ class GitHubClient:
             Comment data
         """
         try:
-            repository = self.client.get_repo(repo)
-            issue = repository.get_issue(issue_number)
-            comment = issue.create_comment(body)
+            comment = await self._request(
+                "POST",
+                f"/repos/{repo}/issues/{issue_number}/comments",
+                json={"body": body}
+            )
             return {
-                "id": comment.id,
-                "body": comment.body,
-                "created_at": comment.created_at.isoformat()
+                "id": comment["id"],
+                "body": comment["body"],
+                "created_at": comment["created_at"]
             }
         except Exception as e:
             raise Exception(f"Error adding comment: {str(e)}")
@@ -142,9 +500,11 @@ class GitHubClient:
             Updated list of labels
         """
         try:
-            repository = self.client.get_repo(repo)
-            issue = repository.get_issue(issue_number)
-            issue.set_labels(*labels)
-            return [label.name for label in issue.labels]
+            result = await self._request(
+                "PUT",
+                f"/repos/{repo}/issues/{issue_number}/labels",
+                json={"labels": labels}
+            )
+            return [label["name"] for label in result]
         except Exception as e:
-            raise Exception(f"Error updating labels: {str(e)}") 
\ No newline at end of file
+            raise Exception(f"Error updating labels: {str(e)}")
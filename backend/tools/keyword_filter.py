@@ -0,0 +1,43 @@
+"""
+Keyword filtering for pages of Slack messages.
+"""
+from typing import Callable, Dict, List
+import re
+import ahocorasick
+import pyarrow as pa
+import pyarrow.compute as pc
+
+# Keyword sets up to this size are matched with one vectorized regex per
+# page; larger ones (e.g. watch lists passed to SlackTools.monitor_channel
+# by callers other than the chat agent) use an Aho-Corasick automaton,
+# which doesn't slow down as keywords are added
+REGEX_KEYWORD_LIMIT = 64
+
+def keyword_filter(keywords: List[str]) -> Callable[[List[Dict]], List[Dict]]:
+    """Build a case-insensitive filter for pages of messages.
+    
+    Args:
+        keywords: Non-empty list of keywords to search for
+        
+    Returns:
+        Function returning the messages of a page that contain any keyword
+    """
+    if len(keywords) > REGEX_KEYWORD_LIMIT:
+        automaton = ahocorasick.Automaton()
+        for keyword in keywords:
+            automaton.add_word(keyword.lower(), keyword)
+        automaton.make_automaton()
+        return lambda page: [
+            msg for msg in page
+            if next(automaton.iter(msg.get("text", "").lower()), None) is not None
+        ]
+    
+    pattern = "|".join(re.escape(keyword.lower()) for keyword in keywords)
+    
+    def filter_page(page: List[Dict]) -> List[Dict]:
+        # Lowercase and match the whole page's texts in one pass each
+        texts = pa.array([msg.get("text", "") for msg in page], type=pa.string())
+        mask = pc.match_substring_regex(pc.utf8_lower(texts), pattern)
+        return [msg for msg, hit in zip(page, mask.to_pylist()) if hit]
+    
+    return filter_page
@@ -0,0 +1,53 @@
+"""
+Retry helpers shared by the Slack and GitHub clients.
+"""
+from typing import Optional
+import random
+
+# Transient server errors. The server may already have applied the
+# request, so only idempotent requests are retried on these
+SERVER_ERROR_STATUSES = frozenset({500, 502, 503, 504})
+
+def is_retryable(status: int, idempotent: bool) -> bool:
+    """Decide whether a failed response is worth retrying.
+    
+    A 429 means the request was rejected unprocessed, so it is retried for
+    any method; 5xx responses only for idempotent requests, since retrying
+    a write that went through would apply it twice.
+    
+    Args:
+        status: HTTP status of the response
+        idempotent: Whether repeating the request is safe
+        
+    Returns:
+        True if the request should be retried
+    """
+    return status == 429 or (idempotent and status in SERVER_ERROR_STATUSES)
+
+def backoff_delay(
+    attempt: int,
+    retry_after: Optional[str] = None,
+    base: float = 0.5,
+    cap: float = 30.0
+) -> float:
+    """Compute how long to wait before retrying a failed request.
+    
+    A Retry-After header from the server wins; otherwise the delay doubles
+    with each attempt, capped, plus up to half a second of jitter so that
+    concurrent callers don't retry in lockstep.
+    
+    Args:
+        attempt: Zero-based number of the attempt that just failed
+        retry_after: Value of the response's Retry-After header (optional)
+        base: Delay before the first retry in seconds
+        cap: Maximum backoff in seconds, before jitter
+        
+    Returns:
+        Delay in seconds
+    """
+    if retry_after:
+        try:
+            return max(float(retry_after), 0.0)
+        except ValueError:
+            pass
+    return min(base * 2 ** attempt, cap) + random.random() * 0.5
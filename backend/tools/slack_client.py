@@ -2,10 +2,21 @@
 Slack API client for Synapse agent platform.
 Handles authentication, message retrieval, and thread operations.
 """
-from typing import List, Dict, Optional
-from slack_sdk import WebClient
+from typing import Any, AsyncIterator, List, Dict, Optional
+import asyncio
+import aiohttp
 from slack_sdk.errors import SlackApiError
+from slack_sdk.web.async_client import AsyncWebClient
 from ..config import get_settings
+from .retry import backoff_delay, is_retryable
+
+# Attempts per call for rate-limited (429) responses, and for 5xx responses
+# to methods that are safe to repeat
+_RETRIES = 5
+_IDEMPOTENT_METHODS = frozenset({"conversations_history", "conversations_replies", "chat_update"})
+
+_CONNECTIONS = 64
+_CONNECTIONS_PER_HOST = 8
 
 class SlackClient:
     def __init__(self, token: Optional[str] = None):
@@ -18,7 +29,59 @@ class SlackClient:
         self.token = token or settings.slack_bot_token
         if not self.token:
             raise ValueError("Slack bot token not provided")
-        self.client = WebClient(token=self.token)
+        self._client: Optional[AsyncWebClient] = None
+        self._semaphore = asyncio.Semaphore(settings.slack_max_concurrency)
+
+    @property
+    def client(self) -> AsyncWebClient:
+        """Get the Web API client, creating it and its session on first use.
+        
+        AsyncWebClient opens a new aiohttp session per call unless given
+        one, so a pooled session is created here. This happens lazily
+        because aiohttp binds sessions to the running event loop.
+        """
+        if self._client is None or self._client.session.closed:
+            self._client = AsyncWebClient(
+                token=self.token,
+                session=aiohttp.ClientSession(
+                    connector=aiohttp.TCPConnector(
+                        limit=_CONNECTIONS,
+                        limit_per_host=_CONNECTIONS_PER_HOST
+                    )
+                )
+            )
+        return self._client
+
+    async def aclose(self):
+        """Close the HTTP session and its pooled connections."""
+        if self._client is not None:
+            await self._client.session.close()
+
+    async def _call(self, method: str, **kwargs) -> Any:
+        """Call a Web API method, retrying rate-limited and transient failures.
+        
+        5xx responses are only retried for methods in _IDEMPOTENT_METHODS;
+        a post that failed after Slack stored it would otherwise be duplicated.
+        
+        At most slack_max_concurrency calls are in flight per client, and
+        Retry-After is honoured when Slack sends it.
+        
+        Args:
+            method: AsyncWebClient method name (e.g. "chat_postMessage")
+            **kwargs: Arguments for the method
+            
+        Returns:
+            Slack API response
+        """
+        for attempt in range(_RETRIES):
+            try:
+                async with self._semaphore:
+                    return await getattr(self.client, method)(**kwargs)
+            except SlackApiError as e:
+                status = e.response.status_code
+                if attempt == _RETRIES - 1 or not is_retryable(status, method in _IDEMPOTENT_METHODS):
+                    raise
+                await asyncio.sleep(backoff_delay(attempt, e.response.headers.get("Retry-After")))
 
     async def get_thread_messages(self, channel: str, thread_ts: str) -> List[Dict]:
         """Retrieve all messages in a thread.
@@ -31,7 +94,8 @@ class SlackClient:
             List of message dictionaries containing thread content
         """
         try:
-            result = self.client.conversations_replies(
+            result = await self._call(
+                "conversations_replies",
                 channel=channel,
                 ts=thread_ts
             )
@@ -56,7 +120,8 @@ class SlackClient:
             List of message dictionaries
         """
         try:
-            result = self.client.conversations_history(
+            result = await self._call(
+                "conversations_history",
                 channel=channel,
                 limit=limit,
                 oldest=oldest
@@ -65,6 +130,47 @@ class SlackClient:
         except SlackApiError as e:
             raise Exception(f"Error fetching channel history: {str(e)}")
 
+    async def iter_channel_pages(
+        self,
+        channel: str,
+        limit: Optional[int] = None,
+        oldest: Optional[str] = None,
+        page_size: int = 200
+    ) -> AsyncIterator[List[Dict]]:
+        """Yield pages of channel messages, following the cursor.
+        
+        Args:
+            channel: Slack channel ID
+            limit: Maximum number of messages to yield (optional)
+            oldest: Timestamp to start from (optional)
+            page_size: Number of messages requested per page
+            
+        Yields:
+            Lists of message dictionaries, newest first
+        """
+        cursor = None
+        remaining = limit
+        while remaining is None or remaining > 0:
+            try:
+                result = await self._call(
+                    "conversations_history",
+                    channel=channel,
+                    limit=page_size if remaining is None else min(page_size, remaining),
+                    oldest=oldest,
+                    cursor=cursor
+                )
+            except SlackApiError as e:
+                raise Exception(f"Error fetching channel history: {str(e)}")
+            messages = result["messages"]
+            if remaining is not None:
+                messages = messages[:remaining]
+                remaining -= len(messages)
+            if messages:
+                yield messages
+            cursor = (result.get("response_metadata") or {}).get("next_cursor")
+            if not cursor or not messages:
+                return
+
     async def post_message(
         self,
         channel: str,
@@ -82,11 +188,39 @@ class SlackClient:
             Response dictionary from Slack API
         """
         try:
-            result = self.client.chat_postMessage(
+            result = await self._call(
+                "chat_postMessage",
                 channel=channel,
                 text=text,
                 thread_ts=thread_ts
             )
             return result
         except SlackApiError as e:
-            raise Exception(f"Error posting message: {str(e)}") 
\ No newline at end of file
+            raise Exception(f"Error posting message: {str(e)}")
+
+    async def update_message(
+        self,
+        channel: str,
+        ts: str,
+        text: str
+    ) -> Dict:
+        """Replace the text of a previously posted message.
+        
+        Args:
+            channel: Slack channel ID
+            ts: Timestamp of the message to update
+            text: New message text
+            
+        Returns:
+            Response dictionary from Slack API
+        """
+        try:
+            result = await self._call(
+                "chat_update",
+                channel=channel,
+                ts=ts,
+                text=text
+            )
+            return result
+        except SlackApiError as e:
+            raise Exception(f"Error updating message: {str(e)}")
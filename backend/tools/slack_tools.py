@@ -2,13 +2,27 @@
 Slack tools for Synapse agent platform.
 Provides functionality for thread summarization and channel monitoring.
 """
-from typing import Dict, List, Optional
-import json
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional
+import hashlib
 import time
+import orjson
+from .keyword_filter import keyword_filter
 from .slack_client import SlackClient
 from ..llm.openai_client import OpenAIClient
 from ..memory.redis_cache import RedisCache
-from ..tracking.mlflow_tracker import MLflowTracker
+from ..tracking.mlflow_tracker import MLflowTracker, get_tracker
+
+def _thread_digest(messages: List[Dict]) -> str:
+    """Hash the author, text and timestamp of every message in a thread.
+    
+    Args:
+        messages: List of message dictionaries
+        
+    Returns:
+        Hex SHA-256 digest of the thread content
+    """
+    content = [(msg.get("user"), msg.get("text"), msg.get("ts")) for msg in messages]
+    return hashlib.sha256(orjson.dumps(content)).hexdigest()
 
 class SlackTools:
     def __init__(
@@ -29,13 +43,14 @@ class SlackTools:
         self.client = client or SlackClient()
         self.llm_client = llm_client or OpenAIClient()
         self.cache = cache or RedisCache()
-        self.tracker = tracker or MLflowTracker()
+        self.tracker = tracker or get_tracker()
 
     async def summarize_thread(
         self,
         channel: str,
         thread_ts: str,
-        model: str = "gpt-4-turbo-preview"
+        model: str = "gpt-4-turbo-preview",
+        on_update: Optional[Callable[[str], Awaitable[None]]] = None
     ) -> Dict:
         """Summarize a Slack thread using LLM.
         
@@ -43,31 +58,33 @@ class SlackTools:
             channel: Slack channel ID
             thread_ts: Thread timestamp to summarize
             model: LLM model to use for summarization
+            on_update: Coroutine called with the partial summary while it streams (optional)
             
         Returns:
             Dictionary containing summary and metadata
         """
         start_time = time.time()
         
-        # Check cache first
-        cached_summary = await self.cache.get_thread_summary(channel, thread_ts)
-        if cached_summary:
-            self.tracker.log_tool_usage(
-                tool_name="summarize_thread",
-                input_data={"channel": channel, "thread_ts": thread_ts},
-                output_data=cached_summary,
-                duration=time.time() - start_time,
-                status="cache_hit"
-            )
-            return cached_summary
-
         try:
-            # Get thread messages
+            # Get thread messages; the cache is keyed on their content
             messages = await self.client.get_thread_messages(channel, thread_ts)
+            digest = _thread_digest(messages)
+            
+            # Check cache first
+            cached_summary = await self.cache.get_thread_summary(channel, digest)
+            if cached_summary:
+                self.tracker.log_tool_usage(
+                    tool_name="summarize_thread",
+                    input_data={"channel": channel, "thread_ts": thread_ts},
+                    output_data=cached_summary,
+                    duration=time.time() - start_time,
+                    status="cache_hit"
+                )
+                return cached_summary
             
             # Generate summary using LLM
             llm_start_time = time.time()
-            summary_result = await self.llm_client.summarize_thread(messages, model)
+            summary_result = await self.llm_client.summarize_thread(messages, model, on_update=on_update)
             llm_duration = time.time() - llm_start_time
             
             # Log LLM usage
@@ -80,7 +97,7 @@ class SlackTools:
             )
             
             # Cache the summary
-            await self.cache.set_thread_summary(channel, thread_ts, summary_result)
+            await self.cache.set_thread_summary(channel, digest, summary_result)
             
             # Log tool usage
             self.tracker.log_tool_usage(
@@ -102,6 +119,32 @@ class SlackTools:
             )
             raise
 
+    async def iter_channel_matches(
+        self,
+        channel: str,
+        keywords: List[str],
+        limit: int = 100
+    ) -> AsyncIterator[Dict]:
+        """Stream channel messages that contain any of the keywords.
+        
+        Matches are yielded as each history page arrives, so only one page
+        is held in memory at a time.
+        
+        Args:
+            channel: Slack channel ID
+            keywords: List of keywords to search for
+            limit: Maximum number of messages to check
+            
+        Yields:
+            Matching message dictionaries
+        """
+        if not keywords:
+            return
+        filter_page = keyword_filter(keywords)
+        async for page in self.client.iter_channel_pages(channel, limit=limit):
+            for msg in filter_page(page):
+                yield msg
+
     async def monitor_channel(
         self,
         channel: str,
@@ -121,14 +164,10 @@ class SlackTools:
         start_time = time.time()
         
         try:
-            messages = await self.client.get_channel_history(channel, limit=limit)
-            
-            # Filter messages containing keywords
-            matches = []
-            for msg in messages:
-                text = msg.get("text", "").lower()
-                if any(keyword.lower() in text for keyword in keywords):
-                    matches.append(msg)
+            # Filter messages containing keywords as the history streams in
+            matches = [
+                msg async for msg in self.iter_channel_matches(channel, keywords, limit=limit)
+            ]
             
             # Log tool usage
             self.tracker.log_tool_usage(
@@ -194,3 +233,48 @@ class SlackTools:
                 status="error"
             )
             raise
+
+    async def update_summary(
+        self,
+        channel: str,
+        ts: str,
+        summary: str
+    ) -> Dict:
+        """Replace the text of a previously posted thread summary.
+        
+        Args:
+            channel: Slack channel ID
+            ts: Timestamp of the summary message
+            summary: Summary text to show
+            
+        Returns:
+            Response from Slack API
+        """
+        start_time = time.time()
+        
+        try:
+            result = await self.client.update_message(
+                channel=channel,
+                ts=ts,
+                text=f"📝 *Thread Summary*\n{summary}"
+            )
+            
+            # Log tool usage
+            self.tracker.log_tool_usage(
+                tool_name="update_summary",
+                input_data={"channel": channel, "ts": ts, "summary": summary},
+                output_data=result,
+                duration=time.time() - start_time
+            )
+            
+            return result
+            
+        except Exception as e:
+            self.tracker.log_tool_usage(
+                tool_name="update_summary",
+                input_data={"channel": channel, "ts": ts, "summary": summary},
+                output_data={"error": str(e)},
+                duration=time.time() - start_time,
+                status="error"
+            )
+            raise
@@ -2,12 +2,37 @@
 MLflow tracker for Synapse.
 Handles tracking of tool usage, performance metrics, and experiment logging.
 """
+import asyncio
+import logging
+import threading
+from functools import lru_cache
 import mlflow
-from typing import Dict, Any, Optional
+from mlflow.entities import Metric
+from mlflow.tracking import MlflowClient
+import orjson
+from typing import Dict, Any, List, Optional
 import time
 from datetime import datetime
 from ..config import get_settings
 
+logger = logging.getLogger(__name__)
+
+# Queued records are flushed into one MLflow run when this many
+# accumulate or after this many seconds, whichever comes first
+_LOG_BATCH_SIZE = 64
+_LOG_FLUSH_INTERVAL = 1.0
+
+def _dump(data: Any) -> bytes:
+    """Serialize data to JSON, stringifying values orjson can't encode."""
+    return orjson.dumps(data, default=str, option=orjson.OPT_NON_STR_KEYS)
+
+def _event_line(meta: Dict[str, Any], **payloads: bytes) -> bytes:
+    """Build one JSON line from metadata plus already-serialized payloads."""
+    parts = [_dump(meta)[:-1]]
+    for key, value in payloads.items():
+        parts.append(b',"' + key.encode() + b'":' + value)
+    return b"".join(parts) + b"}"
+
 class MLflowTracker:
     def __init__(
         self,
@@ -22,7 +47,28 @@ class MLflowTracker:
         """
         settings = get_settings()
         mlflow.set_tracking_uri(tracking_uri or settings.mlflow_tracking_uri)
-        mlflow.set_experiment(experiment_name or settings.mlflow_experiment_name)
+        self.experiment_name = experiment_name or settings.mlflow_experiment_name
+        # The experiment is looked up (or created) on first use, since that
+        # talks to the tracking server
+        self._experiment_id: Optional[str] = None
+        self._initialized = False
+        self._init_lock = threading.Lock()
+        self._log_q: Optional[asyncio.Queue] = None
+        self._log_task: Optional[asyncio.Task] = None
+        
+    def _ensure_experiment(self) -> str:
+        """Set the MLflow experiment on first use (blocking).
+        
+        Returns:
+            Experiment ID
+        """
+        if not self._initialized:
+            with self._init_lock:
+                if not self._initialized:
+                    experiment = mlflow.set_experiment(self.experiment_name)
+                    self._experiment_id = experiment.experiment_id
+                    self._initialized = True
+        return self._experiment_id
         
     def start_run(self, run_name: Optional[str] = None) -> str:
         """Start a new MLflow run.
@@ -33,6 +79,7 @@ class MLflowTracker:
         Returns:
             Run ID
         """
+        self._ensure_experiment()
         run = mlflow.start_run(run_name=run_name)
         return run.info.run_id
         
@@ -50,6 +97,9 @@ class MLflowTracker:
     ):
         """Log tool usage metrics.
         
+        Inside a running event loop the record is queued and written by a
+        background task; otherwise it is written immediately.
+        
         Args:
             tool_name: Name of the tool used
             input_data: Input data dictionary
@@ -57,22 +107,28 @@ class MLflowTracker:
             duration: Execution duration in seconds
             status: Execution status
         """
-        with mlflow.start_run(nested=True) as run:
-            mlflow.log_params({
-                "tool": tool_name,
-                "status": status,
-                "timestamp": datetime.now().isoformat()
-            })
-            
-            mlflow.log_metrics({
-                "duration": duration,
-                "input_size": len(str(input_data)),
-                "output_size": len(str(output_data))
-            })
-            
-            mlflow.log_dict(input_data, "input.json")
-            mlflow.log_dict(output_data, "output.json")
-            
+        input_json = _dump(input_data)
+        output_json = _dump(output_data)
+        self._enqueue({
+            "timestamp": int(time.time() * 1000),
+            "metrics": {
+                f"{tool_name}.duration": duration,
+                f"{tool_name}.input_size": len(input_json),
+                f"{tool_name}.output_size": len(output_json)
+            },
+            "line": _event_line(
+                {
+                    "type": "tool",
+                    "tool": tool_name,
+                    "status": status,
+                    "timestamp": datetime.now().isoformat(),
+                    "duration": duration
+                },
+                input=input_json,
+                output=output_json
+            )
+        })
+        
     def log_llm_usage(
         self,
         model: str,
@@ -83,6 +139,8 @@ class MLflowTracker:
     ):
         """Log LLM usage metrics.
         
+        Queued like log_tool_usage.
+        
         Args:
             model: Model name
             prompt: Input prompt
@@ -90,18 +148,131 @@ class MLflowTracker:
             token_count: Number of tokens used
             duration: Execution duration in seconds
         """
-        with mlflow.start_run(nested=True) as run:
-            mlflow.log_params({
+        self._enqueue({
+            "timestamp": int(time.time() * 1000),
+            "metrics": {
+                f"{model}.token_count": token_count,
+                f"{model}.duration": duration,
+                f"{model}.prompt_length": len(prompt),
+                f"{model}.response_length": len(response)
+            },
+            "line": _dump({
+                "type": "llm",
                 "model": model,
-                "timestamp": datetime.now().isoformat()
-            })
-            
-            mlflow.log_metrics({
-                "token_count": token_count,
+                "timestamp": datetime.now().isoformat(),
                 "duration": duration,
-                "prompt_length": len(prompt),
-                "response_length": len(response)
+                "token_count": token_count,
+                "prompt": prompt,
+                "response": response
             })
+        })
+        
+    def _enqueue(self, record: Dict[str, Any]):
+        """Queue a record for the background writer, or write it now."""
+        if self._ensure_drain():
+            self._log_q.put_nowait(record)
+        else:
+            self._write_batch([record])
             
-            mlflow.log_text(prompt, "prompt.txt")
-            mlflow.log_text(response, "response.txt") 
\ No newline at end of file
+    def _ensure_drain(self) -> bool:
+        """Start the background log writer if an event loop is running.
+        
+        Returns:
+            True if records can be queued
+        """
+        if self._log_task is None or self._log_task.done():
+            try:
+                loop = asyncio.get_running_loop()
+            except RuntimeError:
+                return False
+            if self._log_q is None:
+                self._log_q = asyncio.Queue()
+            self._log_task = loop.create_task(self._drain_logs())
+        return True
+        
+    async def _drain_logs(self):
+        """Write queued records in batches off the event loop.
+        
+        Returns once it dequeues the None sentinel, after writing the batch
+        gathered so far.
+        """
+        loop = asyncio.get_running_loop()
+        stopping = False
+        while not stopping:
+            record = await self._log_q.get()
+            if record is None:
+                return
+            batch = [record]
+            deadline = loop.time() + _LOG_FLUSH_INTERVAL
+            while len(batch) < _LOG_BATCH_SIZE:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    record = await asyncio.wait_for(self._log_q.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if record is None:
+                    stopping = True
+                    break
+                batch.append(record)
+            await loop.run_in_executor(None, self._write_batch, batch)
+            
+    def _write_batch(self, batch: List[Dict[str, Any]]):
+        """Write a batch of records to a single MLflow run (blocking).
+        
+        Metrics go through one log_batch call, stepped by position in the
+        batch; the full records are stored as an events.jsonl artifact.
+        """
+        try:
+            client = MlflowClient()
+            run_id = client.create_run(self._ensure_experiment()).info.run_id
+            try:
+                client.log_batch(run_id, metrics=[
+                    Metric(key, value, record["timestamp"], step)
+                    for step, record in enumerate(batch)
+                    for key, value in record["metrics"].items()
+                ])
+                client.log_text(
+                    run_id,
+                    b"\n".join(record["line"] for record in batch).decode(),
+                    "events.jsonl"
+                )
+            finally:
+                client.set_terminated(run_id)
+        except Exception:
+            logger.exception("Failed to log %d usage records", len(batch))
+            
+    async def aclose(self):
+        """Stop the background writer and flush any queued records."""
+        if self._log_task is not None:
+            if not self._log_task.done():
+                # Let the writer finish the batch it is gathering, then stop
+                self._log_q.put_nowait(None)
+                await self._log_task
+            self._log_task = None
+        batch = []
+        while self._log_q is not None and not self._log_q.empty():
+            record = self._log_q.get_nowait()
+            if record is not None:
+                batch.append(record)
+        # The tracker may outlive this event loop (see get_tracker)
+        self._log_q = None
+        if batch:
+            await asyncio.get_running_loop().run_in_executor(None, self._write_batch, batch)
+
+@lru_cache()
+def get_tracker(
+    tracking_uri: Optional[str] = None,
+    experiment_name: Optional[str] = None
+) -> MLflowTracker:
+    """Get a process-wide MLflowTracker for the given URI and experiment.
+    
+    Args:
+        tracking_uri: MLflow tracking server URI (optional, uses config if None)
+        experiment_name: Name of the MLflow experiment (optional, uses config if None)
+        
+    Returns:
+        Cached MLflowTracker instance
+    """
+    return MLflowTracker(tracking_uri, experiment_name)
@@ -0,0 +1,8 @@
+"""
+Pytest configuration for Synapse tests.
+"""
+import sys
+from pathlib import Path
+
+# The backend runs from its own directory (see the imports in backend/main.py)
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
@@ -0,0 +1,38 @@
+import pytest
+import tools.keyword_filter as keyword_filter_module
+from tools.keyword_filter import REGEX_KEYWORD_LIMIT, keyword_filter
+
+PAGE = [
+    {"ts": "1", "text": "Deploy FAILED on prod"},
+    {"ts": "2", "text": "all good here"},
+    {"ts": "3", "text": "see ticket #123 (a.b-c) for details"},
+    {"ts": "4"},
+    {"ts": "5", "text": "Outage: API down"},
+]
+
+# Enough filler keywords to push a keyword set onto the Aho-Corasick path
+FILLER = [f"unused-keyword-{i}" for i in range(REGEX_KEYWORD_LIMIT)]
+
+class TestKeywordFilter:
+    @pytest.mark.parametrize("filler", [[], FILLER], ids=["regex", "aho-corasick"])
+    @pytest.mark.parametrize("keywords, expected", [
+        (["failed"], ["1"]),
+        (["OUTAGE", "deploy"], ["1", "5"]),
+        (["#123 (a.b-c)"], ["3"]),
+        (["good here", "api down"], ["2", "5"]),
+        (["missing"], []),
+    ])
+    def test_matches_case_insensitive_substrings(self, filler, keywords, expected):
+        """Test that both matching strategies select the same messages."""
+        filter_page = keyword_filter(keywords + filler)
+
+        assert [msg["ts"] for msg in filter_page(PAGE)] == expected
+
+    def test_large_keyword_sets_use_automaton(self, monkeypatch):
+        """Test that keyword sets over the limit don't build a regex."""
+        def fail(*args, **kwargs):
+            raise AssertionError("regex path used")
+        monkeypatch.setattr(keyword_filter_module.pc, "match_substring_regex", fail)
+        filter_page = keyword_filter(["deploy"] + FILLER)
+
+        assert [msg["ts"] for msg in filter_page(PAGE)] == ["1"]
@@ -0,0 +1,29 @@
+import pytest
+from agent.parsing import preprocess
+
+class TestPreprocess:
+    @pytest.mark.parametrize("message, repo, pr", [
+        ("review pr octo/app #12", "octo/app", 12),
+        ("review octo/app#7", "octo/app", 7),
+        ("review octo/app PR 42", "octo/app", 42),
+        ("review pr acme/api-v3 #5", "acme/api-v3", 5),
+        ("review octo/app2 pr 5", "octo/app2", 5),
+        ("Review PR octo/app v2 #7", "octo/app", 7),
+    ])
+    def test_review_extracts_repo_and_pr(self, message, repo, pr):
+        """Test that a repo followed by a PR number is extracted."""
+        parsed = preprocess(message)
+
+        assert parsed.repo == repo
+        assert parsed.pr == pr
+
+    @pytest.mark.parametrize("message, repo", [
+        ("review pr acme/api-v3", "acme/api-v3"),
+        ("review pr octo/app2 please", "octo/app2"),
+    ])
+    def test_review_does_not_split_digits_off_repo(self, message, repo):
+        """Test that trailing digits in a repo slug are not taken as the PR number."""
+        parsed = preprocess(message)
+
+        assert parsed.repo == repo
+        assert parsed.pr is None